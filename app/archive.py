@@ -0,0 +1,69 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import and_, delete, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.post import Post
+from app.models.recommendation import Recommendation
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+# Scheduled sessions are archived this long after their start time
+SCHEDULED_GRACE = timedelta(hours=12)
+# Unscheduled posts are archived once they have been idle this long
+UNSCHEDULED_TTL = timedelta(days=30)
+
+
+def archive_stale(db: Session, batch_size: int = BATCH_SIZE) -> int:
+    now = datetime.now(timezone.utc)
+    stale = and_(
+        Post.archived_at.is_(None),
+        or_(
+            Post.scheduled_at < now - SCHEDULED_GRACE,
+            and_(
+                Post.scheduled_at.is_(None),
+                Post.created_at < now - UNSCHEDULED_TTL,
+                or_(Post.updated_at.is_(None), Post.updated_at < now - UNSCHEDULED_TTL),
+            ),
+        ),
+    )
+    total = 0
+    while True:
+        ids = db.scalars(select(Post.id).where(stale).order_by(Post.id).limit(batch_size)).all()
+        if not ids:
+            return total
+        db.execute(update(Post).where(Post.id.in_(ids)).values(archived_at=now))
+        db.execute(delete(Recommendation).where(Recommendation.post_id.in_(ids)))
+        db.commit()
+        total += len(ids)
+
+
+def archive_once() -> int:
+    db = SessionLocal()
+    try:
+        return archive_stale(db)
+    finally:
+        db.close()
+
+
+async def run_archiver() -> None:
+    while True:
+        try:
+            archived = await asyncio.to_thread(archive_once)
+            if archived:
+                logger.info("archived %d stale post(s)", archived)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("post archiver run failed")
+        await asyncio.sleep(settings.ARCHIVE_INTERVAL_SECONDS)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    print(f"Archived {archive_once()} post(s).")
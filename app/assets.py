@@ -0,0 +1,110 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import shutil
+from pathlib import Path
+
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+
+from app.compression import negotiate_encodings
+
+try:
+    import brotli
+except ImportError:  # brotli variants are skipped when the package is absent
+    brotli = None
+
+STATIC_DIR = Path("app/static")
+DIST_DIR = "dist"
+MANIFEST = "manifest.json"
+PRECOMPRESSED = {"br": ".br", "gzip": ".gz"}
+COMPRESSIBLE = {".js", ".css", ".svg", ".json", ".html", ".txt", ".map"}
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+_manifest: dict[str, str] | None = None
+
+
+def build(static_dir: Path = STATIC_DIR) -> dict[str, str]:
+    dist = static_dir / DIST_DIR
+    if dist.exists():
+        shutil.rmtree(dist)
+    dist.mkdir(parents=True)
+
+    manifest = {}
+    for src in sorted(p for p in static_dir.rglob("*") if p.is_file() and dist not in p.parents):
+        rel = src.relative_to(static_dir)
+        data = src.read_bytes()
+        digest = hashlib.sha256(data).hexdigest()[:12]
+        hashed = rel.with_name(f"{rel.stem}.{digest}{rel.suffix}")
+        out = dist / hashed
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out.write_bytes(data)
+        if rel.suffix in COMPRESSIBLE:
+            out.with_name(out.name + ".gz").write_bytes(gzip.compress(data, compresslevel=9, mtime=0))
+            if brotli is not None:
+                out.with_name(out.name + ".br").write_bytes(brotli.compress(data, quality=11))
+        manifest[rel.as_posix()] = f"{DIST_DIR}/{hashed.as_posix()}"
+
+    (dist / MANIFEST).write_text(json.dumps(manifest, indent=2, sort_keys=True))
+    return manifest
+
+
+def static_url(path: str) -> str:
+    global _manifest
+    if _manifest is None:
+        try:
+            _manifest = json.loads((STATIC_DIR / DIST_DIR / MANIFEST).read_text())
+        except FileNotFoundError:
+            _manifest = {}
+    return f"/static/{_manifest.get(path, path)}"
+
+
+def _media_type(path: str) -> str:
+    media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    return f"{media_type}; charset=utf-8" if media_type.startswith("text/") else media_type
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    async def get_response(self, path: str, scope):
+        accept = Headers(scope=scope).get("accept-encoding", "")
+        hashed = path.startswith(DIST_DIR + "/")
+        response = None
+        if hashed:
+            for encoding in negotiate_encodings(accept, PRECOMPRESSED):
+                try:
+                    response = await super().get_response(path + PRECOMPRESSED[encoding], scope)
+                except HTTPException:
+                    continue
+                if response.status_code == 200:
+                    response.headers["content-type"] = _media_type(path)
+                    response.headers["content-encoding"] = encoding
+                break
+        if response is None:
+            response = await super().get_response(path, scope)
+        if hashed:
+            response.headers["vary"] = "Accept-Encoding"
+            if response.status_code in (200, 304):
+                response.headers["cache-control"] = IMMUTABLE
+        return response
+
+
+class StaticBypass:
+    # Hashed assets are sent with "public, immutable", so they must never pass
+    # through SessionMiddleware: it would attach the visitor's Set-Cookie and a
+    # shared cache could then hand that session to everyone for a year.
+    def __init__(self, app, static_app, prefix: str = "/static"):
+        self.app = app
+        self.static_app = static_app
+        self.prefix = prefix
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and (scope["path"] + "/").startswith(self.prefix + "/"):
+            return await self.static_app(scope, receive, send)
+        await self.app(scope, receive, send)
+
+
+if __name__ == "__main__":
+    for src, out in build().items():
+        print(f"{src} -> {out}")
@@ -0,0 +1,93 @@
+import asyncio
+import logging
+import threading
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+# Lowercased usernames and emails known to this process. A miss means the name
+# is free as far as this worker knows; a hit is only a candidate and gets
+# confirmed against the database. Other workers' registrations are not seen
+# here until the next catch_up(), which is fine because the unique constraints
+# have the final say.
+class TakenIndex:
+    def __init__(self):
+        self._usernames: set[str] = set()
+        self._emails: set[str] = set()
+        self._lock = threading.Lock()
+        self._max_id = 0
+        self.ready = False
+
+    def warm(self, db: Session) -> None:
+        usernames, emails, max_id = set(), set(), 0
+        result = db.execute(select(User.id, User.username, User.email).execution_options(yield_per=5000))
+        for user_id, username, email in result:
+            usernames.add(username.lower())
+            emails.add(email.lower())
+            max_id = max(max_id, user_id)
+        with self._lock:
+            self._usernames, self._emails, self._max_id = usernames, emails, max_id
+            self.ready = True
+
+    def catch_up(self, db: Session) -> int:
+        # Pick up registrations made through other workers since the last look
+        rows = db.execute(
+            select(User.id, User.username, User.email).where(User.id > self._max_id).order_by(User.id)
+        ).all()
+        if rows:
+            with self._lock:
+                self._usernames.update(r.username.lower() for r in rows)
+                self._emails.update(r.email.lower() for r in rows)
+                self._max_id = max(self._max_id, rows[-1].id)
+        return len(rows)
+
+    def add(self, username: str, email: str) -> None:
+        with self._lock:
+            self._usernames.add(username.lower())
+            self._emails.add(email.lower())
+
+    def username_taken(self, db: Session, username: str) -> bool:
+        if self.ready and username.lower() not in self._usernames:
+            return False
+        return db.query(User.id).filter(User.username == username).first() is not None
+
+    def email_taken(self, db: Session, email: str) -> bool:
+        if self.ready and email.lower() not in self._emails:
+            return False
+        return db.query(User.id).filter(User.email == email).first() is not None
+
+
+taken = TakenIndex()
+
+
+def warm_index() -> None:
+    db = SessionLocal()
+    try:
+        taken.warm(db)
+    finally:
+        db.close()
+
+
+def catch_up_once() -> int:
+    db = SessionLocal()
+    try:
+        return taken.catch_up(db)
+    finally:
+        db.close()
+
+
+async def run_index_refresher() -> None:
+    while True:
+        await asyncio.sleep(settings.AVAILABILITY_REFRESH_SECONDS)
+        try:
+            await asyncio.to_thread(catch_up_once)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("availability index catch-up failed")
@@ -0,0 +1,147 @@
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # fall back to gzip only when brotli is absent
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+)
+
+
+def negotiate_encodings(accept_encoding: str, offered) -> list[str]:
+    # Offered codings the client accepts, most preferred first. "q=0" means the
+    # coding is refused, and "*" stands in for anything not listed explicitly.
+    qualities: dict[str, float] = {}
+    for item in accept_encoding.lower().split(","):
+        coding, *params = (part.strip() for part in item.split(";"))
+        if not coding:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        qualities[coding] = q
+    ranked = [(qualities.get(c, qualities.get("*", 0.0)), i, c) for i, c in enumerate(offered)]
+    return [c for q, i, c in sorted(ranked, key=lambda r: (-r[0], r[1])) if q > 0]
+
+
+class _Gzip:
+    def __init__(self, level: int):
+        self._z = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def process(self, data: bytes) -> bytes:
+        # Sync-flush every chunk so streamed pages still reach the client incrementally
+        return self._z.compress(data) + self._z.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._z.flush()
+
+
+class _Brotli:
+    def __init__(self, quality: int):
+        self._c = brotli.Compressor(quality=quality)
+
+    def process(self, data: bytes) -> bytes:
+        return self._c.process(data) + self._c.flush()
+
+    def finish(self) -> bytes:
+        return self._c.finish()
+
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size: int = 500, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        offered = ("br", "gzip") if brotli is not None else ("gzip",)
+        encodings = negotiate_encodings(Headers(scope=scope).get("accept-encoding", ""), offered)
+        if not encodings:
+            return await self.app(scope, receive, send)
+
+        await self.app(scope, receive, _Responder(self, encodings[0], send).send)
+
+
+class _Responder:
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self._send = send
+        self.start = None
+        self.buffer = []
+        self.buffered = 0
+        self.compressor = None
+        self.passthrough = False
+
+    def _eligible(self) -> bool:
+        headers = Headers(raw=self.start["headers"])
+        # Byte ranges refer to the identity body, so partial responses pass through
+        if "content-encoding" in headers or "content-range" in headers or self.start["status"] == 206:
+            return False
+        content_type = headers.get("content-type", "")
+        return content_type.startswith(COMPRESSIBLE_TYPES)
+
+    async def _begin(self, compress: bool) -> None:
+        if compress:
+            headers = MutableHeaders(raw=self.start["headers"])
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            del headers["Content-Length"]
+            if self.encoding == "br":
+                self.compressor = _Brotli(self.middleware.brotli_quality)
+            else:
+                self.compressor = _Gzip(self.middleware.gzip_level)
+        else:
+            self.passthrough = True
+        await self._send(self.start)
+
+    async def send(self, message) -> None:
+        if message["type"] == "http.response.start":
+            self.start = message
+            return
+        if message["type"] != "http.response.body":
+            return await self._send(message)
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.passthrough:
+            return await self._send(message)
+
+        if self.compressor is None:
+            if not self._eligible():
+                await self._begin(False)
+                return await self._send(message)
+            # Hold back small responses until we know whether they clear the threshold
+            self.buffer.append(body)
+            self.buffered += len(body)
+            if self.buffered < self.middleware.minimum_size:
+                if more_body:
+                    return
+                await self._begin(False)
+                return await self._send({"type": "http.response.body", "body": b"".join(self.buffer)})
+            await self._begin(True)
+            body, self.buffer = b"".join(self.buffer), []
+
+        data = self.compressor.process(body)
+        if not more_body:
+            data += self.compressor.finish()
+        await self._send({"type": "http.response.body", "body": data, "more_body": more_body})
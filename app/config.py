@@ -7,6 +7,43 @@ class Settings(BaseSettings):
     IGDB_CLIENT_ID: str
     IGDB_CLIENT_SECRET: str
 
+    # Run the outbox worker inside the web process; disable when running
+    # `python -m app.outbox` as a separate process instead.
+    OUTBOX_WORKER: bool = True
+    OUTBOX_BATCH_SIZE: int = 200
+    OUTBOX_POLL_SECONDS: float = 1.0
+
+    RATE_LIMIT_ENABLED: bool = True
+    # Share rate-limit counters between workers; in-process memory when empty
+    RATE_LIMIT_REDIS_URL: str = ""
+    # Reverse proxies in front of the app; the client IP is taken from that many
+    # entries from the right of X-Forwarded-For (0 = ignore the header)
+    RATE_LIMIT_TRUSTED_HOPS: int = 0
+    # Requests in flight per process before new ones are shed with 503 (0 = off)
+    MAX_IN_FLIGHT: int = 256
+
+    # Seconds between runs of the stale-post archiver (0 = don't run in-process)
+    ARCHIVE_INTERVAL_SECONDS: int = 900
+    # Seconds between expiring old buckets from the trending windows (0 = don't run in-process)
+    TRENDING_ROLL_SECONDS: int = 300
+    # Seconds between pulling other workers' registrations into the availability index (0 = off)
+    AVAILABILITY_REFRESH_SECONDS: int = 5
+
+    # Request profiler: profile PROFILE_ROUTES (comma-separated path prefixes)
+    # plus a random PROFILE_SAMPLE_RATE of all requests, keeping only the slow ones
+    PROFILE_ENABLED: bool = False
+    PROFILE_ROUTES: str = ""
+    PROFILE_SAMPLE_RATE: float = 0.0
+    PROFILE_THRESHOLD_MS: int = 500
+    PROFILE_INTERVAL_MS: int = 5
+    PROFILE_DIR: str = "profiles"
+    PROFILE_MAX_FILES: int = 200
+
+    # Bearer token for /admin/export; the endpoint is disabled when empty
+    EXPORT_TOKEN: str = ""
+    # Optional read replica for bulk exports; defaults to DATABASE_URL
+    EXPORT_DATABASE_URL: str = ""
+
     class Config:
         env_file = ".env"
 
@@ -0,0 +1,123 @@
+import argparse
+import csv
+import io
+import json
+import sys
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.engine import Connection, Engine
+
+from app.config import settings
+from app.database import engine as primary_engine
+from app.models.membership import Membership
+from app.models.notification import Notification
+from app.models.post import Post
+from app.models.user import User
+
+CHUNK_SIZE = 5000
+# Watermark values are stamped by the app before commit, so a transaction can
+# land with a value older than rows already exported. Only rows older than
+# this lag are considered settled enough to export.
+SAFETY_LAG = timedelta(minutes=5)
+FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+# Each table's incremental watermark: rows changed after `since` are exported
+TABLES = {
+    "users": (User.__table__, User.created_at),
+    "posts": (Post.__table__, func.coalesce(Post.updated_at, Post.created_at)),
+    "memberships": (Membership.__table__, func.coalesce(Membership.responded_at, Membership.requested_at)),
+    "notifications": (Notification.__table__, Notification.created_at),
+}
+EXCLUDED_COLUMNS = {"password_hash"}
+
+_export_engine: Engine | None = None
+
+
+def export_engine() -> Engine:
+    # Point EXPORT_DATABASE_URL at a replica to keep exports off the primary
+    global _export_engine
+    if _export_engine is None:
+        _export_engine = create_engine(settings.EXPORT_DATABASE_URL) if settings.EXPORT_DATABASE_URL else primary_engine
+    return _export_engine
+
+
+def _columns(table: str) -> list:
+    return [c for c in TABLES[table][0].c if c.name not in EXCLUDED_COLUMNS]
+
+
+def _utc(value: datetime) -> datetime:
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def high_watermark(conn: Connection, table: str, since: datetime | None = None) -> datetime | None:
+    latest = conn.execute(select(func.max(TABLES[table][1]))).scalar()
+    if latest is None:
+        return since
+    until = min(_utc(latest), datetime.now(timezone.utc) - SAFETY_LAG)
+    # Never hand back a watermark behind the caller's, or the next run would repeat rows
+    return max(until, _utc(since)) if since is not None else until
+
+
+def _query(table: str, since: datetime | None, until: datetime | None):
+    watermark = TABLES[table][1]
+    stmt = select(*_columns(table)).order_by(watermark, TABLES[table][0].c.id)
+    if since is not None:
+        stmt = stmt.where(watermark > since)
+    if until is not None:
+        stmt = stmt.where(watermark <= until)
+    return stmt
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"cannot serialize {type(value).__name__}")
+
+
+def _encode(rows, names: list[str], fmt: str, header: bool):
+    if fmt == "ndjson":
+        return "".join(json.dumps(dict(zip(names, row)), default=_json_default) + "\n" for row in rows).encode()
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    if header:
+        writer.writerow(names)
+    writer.writerows(rows)
+    return buf.getvalue().encode()
+
+
+def _cursor_chunks(conn: Connection, table: str, fmt: str, since, until):
+    names = [c.name for c in _columns(table)]
+    result = conn.execution_options(stream_results=True, yield_per=CHUNK_SIZE).execute(_query(table, since, until))
+    first = True
+    for rows in result.partitions():
+        yield _encode(rows, names, fmt, header=first)
+        first = False
+    if first and fmt == "csv":
+        yield _encode([], names, fmt, header=True)
+
+
+def export_chunks(table: str, fmt: str = "ndjson", since: datetime | None = None, until: datetime | None = None):
+    with export_engine().connect() as conn:
+        yield from _cursor_chunks(conn, table, fmt, since, until)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.export", description="Stream a table out as NDJSON or CSV.")
+    parser.add_argument("table", choices=sorted(TABLES))
+    parser.add_argument("--format", choices=sorted(FORMATS), default="ndjson")
+    parser.add_argument("--since", type=datetime.fromisoformat, help="only rows changed after this ISO timestamp")
+    args = parser.parse_args(argv)
+
+    with export_engine().connect() as conn:
+        until = high_watermark(conn, args.table, args.since)
+    out = sys.stdout.buffer
+    for chunk in export_chunks(args.table, args.format, args.since, until):
+        out.write(chunk)
+    out.flush()
+    if until is not None:
+        print(f"next --since {until.isoformat()}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
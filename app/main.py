@@ -1,24 +1,46 @@
+import asyncio
+
 from fastapi import FastAPI
 from fastapi.responses import RedirectResponse
-from fastapi.staticfiles import StaticFiles
+from starlette.applications import Starlette
+from starlette.routing import Mount
 from starlette.middleware.sessions import SessionMiddleware
 
 from app.config import settings
 from app.database import engine, Base
 from app.flash import get_flashed_messages
 from app.csrf import CSRFMiddleware, csrf_input
+from app.ratelimit import RateLimitMiddleware
+from app.compression import CompressionMiddleware
 from app.routers.notifications import get_unread_count
+from app.outbox import run_worker
+from app.archive import run_archiver
+from app.assets import PrecompressedStaticFiles, StaticBypass, static_url
+from app.availability import run_index_refresher, warm_index
+from app.trending import run_roller, trending_games
 
 # Import models so Base.metadata knows about them before create_all
 import app.models  # noqa: F401
 
-from app.routers import auth, posts, memberships, dashboard, notifications, api
+from app.routers import auth, posts, memberships, dashboard, notifications, api, recommendations, trending, admin
 
 app = FastAPI(title="LFG")
 
 # SessionMiddleware must be added last (outermost) so session is populated before CSRF runs
 app.add_middleware(CSRFMiddleware)
+# Rate limiting sits just inside the session so it can key on user_id but rejects before body parsing
+app.add_middleware(RateLimitMiddleware)
 app.add_middleware(SessionMiddleware, secret_key=settings.SECRET_KEY)
+# Static files are served outside the session so cached asset responses never carry Set-Cookie.
+# Run `python -m app.assets` at deploy time to fingerprint and precompress assets.
+static_files = Starlette(routes=[Mount("/static", PrecompressedStaticFiles(directory="app/static"), name="static")])
+app.add_middleware(StaticBypass, static_app=static_files)
+# Outermost so streamed pages are compressed chunk by chunk as they are rendered
+app.add_middleware(CompressionMiddleware, minimum_size=1024)
+if settings.PROFILE_ENABLED:
+    from app.profiling import ProfilingMiddleware
+
+    app.add_middleware(ProfilingMiddleware)
 
 app.include_router(auth.router)
 app.include_router(posts.router)
@@ -26,19 +48,45 @@ app.include_router(memberships.router)
 app.include_router(dashboard.router)
 app.include_router(notifications.router)
 app.include_router(api.router)
+app.include_router(recommendations.router)
+app.include_router(trending.router)
+app.include_router(admin.router)
+
+if settings.PROFILE_ENABLED:
+    from app.profiling import instrument_routes
 
-app.mount("/static", StaticFiles(directory="app/static"), name="static")
+    # Lets the sampler find the threadpool worker running each profiled endpoint
+    instrument_routes(app)
 
 # Inject globals into every router's Jinja2 environment
-for mod in (auth, posts, memberships, dashboard, notifications):
+for mod in (auth, posts, memberships, dashboard, notifications, recommendations):
     mod.templates.env.globals["get_flashed_messages"] = get_flashed_messages
     mod.templates.env.globals["csrf_input"] = csrf_input
     mod.templates.env.globals["get_unread_count"] = get_unread_count
+    mod.templates.env.globals["static_url"] = static_url
+    mod.templates.env.globals["trending_games"] = trending_games
 
 
 @app.on_event("startup")
-def startup():
+async def startup():
     Base.metadata.create_all(bind=engine)
+    await asyncio.to_thread(warm_index)
+    if settings.OUTBOX_WORKER:
+        app.state.outbox_worker = asyncio.create_task(run_worker())
+    if settings.ARCHIVE_INTERVAL_SECONDS:
+        app.state.archiver = asyncio.create_task(run_archiver())
+    if settings.TRENDING_ROLL_SECONDS:
+        app.state.trending_roller = asyncio.create_task(run_roller())
+    if settings.AVAILABILITY_REFRESH_SECONDS:
+        app.state.index_refresher = asyncio.create_task(run_index_refresher())
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    for name in ("outbox_worker", "archiver", "trending_roller", "index_refresher"):
+        task = getattr(app.state, name, None)
+        if task:
+            task.cancel()
 
 
 @app.get("/")
@@ -2,3 +2,6 @@ from app.models.user import User
 from app.models.post import Post
 from app.models.membership import Membership
 from app.models.notification import Notification
+from app.models.recommendation import Recommendation
+from app.models.outbox import OutboxEvent
+from app.models.trending import GameActivity, GameTrend, TrendWatermark
@@ -1,6 +1,6 @@
 from datetime import datetime, timezone
 from typing import Optional
-from sqlalchemy import String, Text, Integer, DateTime, ForeignKey
+from sqlalchemy import String, Text, Integer, DateTime, ForeignKey, Index, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.database import Base
@@ -31,6 +31,17 @@ class Post(Base):
         onupdate=lambda: datetime.now(timezone.utc),
         nullable=True,
     )
+    archived_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    # Feed queries only ever look at active posts, so index just those rows
+    __table_args__ = (
+        Index(
+            "ix_posts_active_created_at",
+            "created_at",
+            postgresql_where=text("archived_at IS NULL"),
+            sqlite_where=text("archived_at IS NULL"),
+        ),
+    )
 
     author: Mapped["User"] = relationship("User", back_populates="posts")
     memberships: Mapped[list["Membership"]] = relationship(
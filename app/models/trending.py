@@ -0,0 +1,35 @@
+from datetime import datetime
+
+from sqlalchemy import String, Integer, DateTime, Index
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class GameActivity(Base):
+    __tablename__ = "game_activity"
+
+    game: Mapped[str] = mapped_column(String(100), primary_key=True)
+    bucket_start: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+    posts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    joins: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+
+
+class GameTrend(Base):
+    __tablename__ = "game_trends"
+
+    window_hours: Mapped[int] = mapped_column(Integer, primary_key=True)
+    game: Mapped[str] = mapped_column(String(100), primary_key=True)
+    posts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    joins: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    score: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+
+    __table_args__ = (Index("ix_game_trends_window_score", "window_hours", "score"),)
+
+
+class TrendWatermark(Base):
+    __tablename__ = "trend_watermarks"
+
+    window_hours: Mapped[int] = mapped_column(Integer, primary_key=True)
+    # Buckets starting before this have already been subtracted from game_trends
+    expired_before: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
@@ -0,0 +1,181 @@
+import asyncio
+import logging
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.notification import Notification
+from app.models.outbox import OutboxEvent
+from app.recommendations import refresh_post, refresh_user
+from app.trending import bucket_of, record
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 5
+RETENTION = timedelta(days=7)
+PURGE_INTERVAL = timedelta(hours=1)
+
+
+def _event(event_type: str, payload: dict, key: str | None) -> dict:
+    return {"event_type": event_type, "payload": payload, "idempotency_key": key or uuid.uuid4().hex}
+
+
+def enqueue(db: Session, event_type: str, payload: dict, key: str | None = None) -> None:
+    db.add(OutboxEvent(**_event(event_type, payload, key)))
+
+
+def enqueue_many(db: Session, event_type: str, payloads: list[dict]) -> None:
+    if payloads:
+        db.execute(insert(OutboxEvent), [_event(event_type, p, None) for p in payloads])
+
+
+def _deliver_notifications(db: Session, events: list[OutboxEvent]) -> None:
+    db.execute(
+        insert(Notification),
+        [
+            {
+                "user_id": e.payload["user_id"],
+                "message": e.payload["message"],
+                "link": e.payload.get("link"),
+                "created_at": e.created_at,
+            }
+            for e in events
+        ],
+    )
+
+
+def _refresh_recommendations(db: Session, events: list[OutboxEvent]) -> None:
+    # Collapse repeated events so a burst of changes costs one refresh per post/user
+    post_ids = {e.payload["post_id"] for e in events if e.payload.get("post_id")}
+    user_ids = {e.payload["user_id"] for e in events if e.payload.get("user_id")}
+    for post_id in sorted(post_ids):
+        refresh_post(db, post_id)
+    for user_id in sorted(user_ids):
+        refresh_user(db, user_id)
+
+
+def _count_activity(db: Session, events: list[OutboxEvent]) -> None:
+    counts: dict[tuple, list[int]] = defaultdict(lambda: [0, 0])
+    for e in events:
+        key = (e.payload["game"], bucket_of(datetime.fromisoformat(e.payload["at"])))
+        counts[key][0 if e.payload["kind"] == "post" else 1] += 1
+    record(db, counts)
+
+
+HANDLERS = {
+    "notification": _deliver_notifications,
+    "recommendations": _refresh_recommendations,
+    "trending": _count_activity,
+}
+
+
+def _done(event: OutboxEvent, now: datetime) -> None:
+    event.status = "done"
+    event.processed_at = now
+
+
+def _retry(events: list[OutboxEvent], exc: Exception, now: datetime) -> None:
+    for e in events:
+        e.attempts += 1
+        e.last_error = repr(exc)[:1000]
+        if e.attempts >= MAX_ATTEMPTS:
+            e.status = "failed"
+        else:
+            e.available_at = now + timedelta(seconds=2 ** e.attempts)
+
+
+def drain(db: Session, batch_size: int | None = None) -> int:
+    now = datetime.now(timezone.utc)
+    events = (
+        db.execute(
+            select(OutboxEvent)
+            .where(OutboxEvent.status == "pending", OutboxEvent.available_at <= now)
+            .order_by(OutboxEvent.id)
+            .limit(batch_size or settings.OUTBOX_BATCH_SIZE)
+            .with_for_update(skip_locked=True)
+        )
+        .scalars()
+        .all()
+    )
+    if not events:
+        return 0
+
+    by_type: dict[str, list[OutboxEvent]] = defaultdict(list)
+    for e in events:
+        by_type[e.event_type].append(e)
+
+    for event_type, batch in by_type.items():
+        handler = HANDLERS.get(event_type)
+        if handler is None:
+            logger.error("no handler for %d %s event(s)", len(batch), event_type)
+            _retry(batch, LookupError(f"no handler for outbox event type {event_type!r}"), now)
+            continue
+        try:
+            with db.begin_nested():
+                handler(db, batch)
+        except Exception:
+            # Isolate the bad event(s) so they don't hold back the rest of the batch
+            logger.warning("outbox batch of %d %s event(s) failed, retrying one by one", len(batch), event_type)
+            for e in batch:
+                try:
+                    with db.begin_nested():
+                        handler(db, [e])
+                except Exception as exc:
+                    logger.exception("outbox delivery failed for %s event %d", event_type, e.id)
+                    _retry([e], exc, now)
+                else:
+                    _done(e, now)
+            continue
+        for e in batch:
+            _done(e, now)
+    db.commit()
+    return len(events)
+
+
+def purge(db: Session) -> None:
+    cutoff = datetime.now(timezone.utc) - RETENTION
+    db.execute(delete(OutboxEvent).where(OutboxEvent.status == "done", OutboxEvent.processed_at < cutoff))
+    db.commit()
+
+
+def drain_once() -> int:
+    db = SessionLocal()
+    try:
+        return drain(db)
+    finally:
+        db.close()
+
+
+def purge_once() -> None:
+    db = SessionLocal()
+    try:
+        purge(db)
+    finally:
+        db.close()
+
+
+async def run_worker() -> None:
+    last_purge = datetime.min.replace(tzinfo=timezone.utc)
+    while True:
+        try:
+            drained = await asyncio.to_thread(drain_once)
+            if drained:
+                continue
+            if datetime.now(timezone.utc) - last_purge > PURGE_INTERVAL:
+                await asyncio.to_thread(purge_once)
+                last_purge = datetime.now(timezone.utc)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("outbox worker iteration failed")
+        await asyncio.sleep(settings.OUTBOX_POLL_SECONDS)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run_worker())
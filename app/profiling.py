@@ -0,0 +1,183 @@
+import asyncio
+import functools
+import json
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from pathlib import Path
+
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+
+from app.config import settings
+from app.database import engine
+
+# Leaf frames from these files mean the thread is parked, not doing work
+_IDLE_FILES = ("threading.py", "queue.py", "selectors.py", "base_events.py", "thread.py")
+
+
+class RequestStats:
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        # Threads currently running code for this request, with a nesting count;
+        # only these are sampled. The event-loop thread stays in for the whole
+        # request because async code can't be told apart per request: samples
+        # from it may include other requests' async work.
+        self.threads: dict[int, int] = {threading.get_ident(): 1}
+
+    def enter(self) -> None:
+        ident = threading.get_ident()
+        self.threads[ident] = self.threads.get(ident, 0) + 1
+
+    def exit(self) -> None:
+        ident = threading.get_ident()
+        if self.threads.get(ident, 0) > 1:
+            self.threads[ident] -= 1
+        else:
+            self.threads.pop(ident, None)
+
+
+# Set only for requests that are being profiled; contextvars follow the request
+# into the threadpool, so engine events can attribute queries to it.
+_current: ContextVar[RequestStats | None] = ContextVar("profiling_stats", default=None)
+
+
+def _tracked(endpoint):
+    @functools.wraps(endpoint)
+    def wrapper(*args, **kwargs):
+        stats = _current.get()
+        if stats is None:
+            return endpoint(*args, **kwargs)
+        stats.enter()
+        try:
+            return endpoint(*args, **kwargs)
+        finally:
+            stats.exit()
+
+    return wrapper
+
+
+def instrument_routes(app) -> None:
+    # Sync endpoints run on whichever threadpool worker AnyIO picks, so the
+    # endpoint itself registers its thread for exactly as long as it runs.
+    for route in app.routes:
+        if isinstance(route, APIRoute) and not asyncio.iscoroutinefunction(route.dependant.call):
+            route.dependant.call = _tracked(route.dependant.call)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is not None:
+        # Covers queries from threads outside the endpoint, e.g. streamed rendering
+        stats.enter()
+        conn.info.setdefault("profiling_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is not None:
+        stats.exit()
+        stats.queries += 1
+        stats.db_time += time.perf_counter() - conn.info["profiling_start"].pop()
+
+
+def _handle_error(context):
+    stats = _current.get()
+    if stats is not None and context.connection is not None and context.connection.info.get("profiling_start"):
+        stats.exit()
+        context.connection.info["profiling_start"].pop()
+
+
+class Sampler(threading.Thread):
+    def __init__(self, interval: float, stats: RequestStats):
+        super().__init__(name="request-profiler", daemon=True)
+        self.interval = interval
+        self.request = stats
+        self.stacks: Counter = Counter()
+        self._done = threading.Event()
+
+    def run(self) -> None:
+        names = {}
+        while not self._done.wait(self.interval):
+            threads = dict(self.request.threads)
+            for ident, frame in sys._current_frames().items():
+                if ident not in threads or frame.f_code.co_filename.endswith(_IDLE_FILES):
+                    continue
+                if ident not in names:
+                    names.update((t.ident, t.name) for t in threading.enumerate())
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({Path(code.co_filename).name}:{frame.f_lineno})")
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self) -> Counter:
+        self._done.set()
+        self.join()
+        return self.stacks
+
+
+def _write_profile(route: str, method: str, duration: float, stats: RequestStats, stacks: Counter) -> None:
+    out = Path(settings.PROFILE_DIR)
+    out.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+    slug = route.strip("/").replace("/", "_").replace("{", "").replace("}", "") or "root"
+    base = out / f"{stamp}-{method}-{slug}-{int(duration * 1000)}ms"
+
+    base.with_suffix(".collapsed").write_text(
+        "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+    )
+    base.with_suffix(".json").write_text(json.dumps({
+        "route": route,
+        "method": method,
+        "duration_ms": round(duration * 1000, 1),
+        "query_count": stats.queries,
+        "db_time_ms": round(stats.db_time * 1000, 1),
+        "samples": sum(stacks.values()),
+        "interval_ms": settings.PROFILE_INTERVAL_MS,
+    }, indent=2))
+
+    profiles = sorted(out.glob("*.collapsed"))
+    for old in profiles[: max(len(profiles) - settings.PROFILE_MAX_FILES, 0)]:
+        old.unlink(missing_ok=True)
+        old.with_suffix(".json").unlink(missing_ok=True)
+
+
+class ProfilingMiddleware:
+    def __init__(self, app):
+        self.app = app
+        self.routes = tuple(r.strip() for r in settings.PROFILE_ROUTES.split(",") if r.strip())
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(engine, "handle_error", _handle_error)
+
+    def _selected(self, path: str) -> bool:
+        if self.routes and path.startswith(self.routes):
+            return True
+        return random.random() < settings.PROFILE_SAMPLE_RATE
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._selected(scope["path"]):
+            return await self.app(scope, receive, send)
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        sampler = Sampler(settings.PROFILE_INTERVAL_MS / 1000, stats)
+        sampler.start()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            duration = time.perf_counter() - start
+            stacks = sampler.stop()
+            _current.reset(token)
+            if duration * 1000 >= settings.PROFILE_THRESHOLD_MS and stacks:
+                route = getattr(scope.get("route"), "path", scope["path"])
+                await asyncio.to_thread(_write_profile, route, scope["method"], duration, stats, stacks)
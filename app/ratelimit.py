@@ -0,0 +1,195 @@
+import math
+import re
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+from app.config import settings
+
+
+@dataclass(frozen=True)
+class Limit:
+    requests: int
+    window: int  # seconds
+
+
+@dataclass(frozen=True)
+class Rule:
+    name: str
+    method: str
+    path: str
+    per_ip: Optional[Limit] = None
+    per_user: Optional[Limit] = None
+    max_in_flight: int = 0
+
+    def matches(self, request: Request) -> bool:
+        return request.method == self.method and re.fullmatch(self.path, request.url.path) is not None
+
+
+DEFAULT_RULES = (
+    Rule("login", "POST", r"/auth/login", per_ip=Limit(10, 60), max_in_flight=8),
+    Rule("register", "POST", r"/auth/register", per_ip=Limit(5, 3600), max_in_flight=4),
+    Rule("availability", "GET", r"/auth/availability", per_ip=Limit(60, 60)),
+    Rule("join", "POST", r"/posts/\d+/request", per_ip=Limit(30, 60), per_user=Limit(10, 60)),
+)
+
+
+# Both backends use a sliding-window counter: the previous fixed window's count
+# is weighted by how much of it still overlaps the sliding window.
+class MemoryBackend:
+    PRUNE_EVERY = 1000
+
+    def __init__(self):
+        self._windows: dict[str, tuple[int, int, int, int]] = {}
+        self._hits = 0
+
+    async def hit(self, key: str, limit: Limit, now: float) -> float:
+        start = int(now // limit.window) * limit.window
+        _, prev_start, previous, current = self._windows.get(key, (limit.window, start, 0, 0))
+        if prev_start != start:
+            previous = current if prev_start == start - limit.window else 0
+            current = 0
+
+        retry_after = _retry_after(limit, now, start, previous, current)
+        if not retry_after:
+            current += 1
+        self._windows[key] = (limit.window, start, previous, current)
+
+        self._hits += 1
+        if self._hits % self.PRUNE_EVERY == 0:
+            self._prune(now)
+        return retry_after
+
+    def _prune(self, now: float) -> None:
+        # Entries older than two windows no longer affect any estimate
+        self._windows = {k: v for k, v in self._windows.items() if v[1] + 2 * v[0] > now}
+
+
+# Check and increment in one round trip so concurrent workers can't both slip
+# under the limit between reading the counters and bumping them.
+_SLIDING_WINDOW = """
+local previous = tonumber(redis.call('GET', KEYS[1]) or '0')
+local current = tonumber(redis.call('GET', KEYS[2]) or '0')
+if previous * tonumber(ARGV[3]) + current < tonumber(ARGV[1]) then
+    redis.call('INCR', KEYS[2])
+    redis.call('EXPIRE', KEYS[2], 2 * tonumber(ARGV[2]))
+    return {1, previous, current}
+end
+return {0, previous, current}
+"""
+
+
+class RedisBackend:
+    def __init__(self, url: str):
+        try:
+            import redis.asyncio as redis
+        except ImportError as exc:
+            raise RuntimeError("RATE_LIMIT_REDIS_URL is set but the redis package is not installed") from exc
+        self._redis = redis.Redis.from_url(url)
+        self._script = self._redis.register_script(_SLIDING_WINDOW)
+
+    async def hit(self, key: str, limit: Limit, now: float) -> float:
+        start = int(now // limit.window) * limit.window
+        weight = 1 - (now - start) / limit.window
+        allowed, previous, current = await self._script(
+            keys=[f"ratelimit:{key}:{start - limit.window}", f"ratelimit:{key}:{start}"],
+            args=[limit.requests, limit.window, repr(weight)],
+        )
+        if allowed:
+            return 0
+        return _retry_after(limit, now, start, int(previous), int(current)) or 1
+
+
+def _retry_after(limit: Limit, now: float, start: int, previous: int, current: int) -> float:
+    elapsed = now - start
+    weight = 1 - elapsed / limit.window
+    if previous * weight + current < limit.requests:
+        return 0
+    if current >= limit.requests:
+        return limit.window - elapsed
+    # Wait until the previous window's share decays enough to admit one more request
+    needed = 1 - (limit.requests - current) / previous
+    return max(needed * limit.window - elapsed, 1)
+
+
+def _client_ip(request: Request) -> str:
+    # Only the entries appended by our own proxies can be trusted; anything to
+    # their left is whatever the client chose to send.
+    hops = settings.RATE_LIMIT_TRUSTED_HOPS
+    if hops:
+        forwarded = [ip.strip() for ip in request.headers.get("x-forwarded-for", "").split(",") if ip.strip()]
+        if len(forwarded) >= hops:
+            return forwarded[-hops]
+    return request.client.host if request.client else "unknown"
+
+
+def _too_many(retry_after: float) -> Response:
+    return Response(
+        "429 Too Many Requests — slow down and try again shortly",
+        status_code=429,
+        headers={"Retry-After": str(math.ceil(retry_after))},
+    )
+
+
+def _overloaded() -> Response:
+    return Response(
+        "503 Service Unavailable — server is busy, try again shortly",
+        status_code=503,
+        headers={"Retry-After": "1"},
+    )
+
+
+# Pure ASGI rather than BaseHTTPMiddleware: call_next returns as soon as the
+# response starts, which would release the in-flight slot before a streamed
+# body (the posts feed, exports) has been produced.
+class RateLimitMiddleware:
+    def __init__(self, app, rules=DEFAULT_RULES, backend=None):
+        self.app = app
+        self.rules = rules
+        if backend is None:
+            backend = RedisBackend(settings.RATE_LIMIT_REDIS_URL) if settings.RATE_LIMIT_REDIS_URL else MemoryBackend()
+        self.backend = backend
+        self.in_flight = 0
+        self.rule_in_flight: dict[str, int] = {}
+
+    async def _check(self, rule: Rule, request: Request) -> float:
+        now = time.time()
+        if rule.per_ip:
+            retry_after = await self.backend.hit(f"{rule.name}:ip:{_client_ip(request)}", rule.per_ip, now)
+            if retry_after:
+                return retry_after
+        user_id = request.session.get("user_id")
+        if rule.per_user and user_id:
+            return await self.backend.hit(f"{rule.name}:user:{user_id}", rule.per_user, now)
+        return 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.RATE_LIMIT_ENABLED or scope["path"].startswith("/static"):
+            return await self.app(scope, receive, send)
+
+        # Shed load before any database or bcrypt work is started
+        if settings.MAX_IN_FLIGHT and self.in_flight >= settings.MAX_IN_FLIGHT:
+            return await _overloaded()(scope, receive, send)
+
+        request = Request(scope)
+        rule = next((r for r in self.rules if r.matches(request)), None)
+        if rule:
+            if rule.max_in_flight and self.rule_in_flight.get(rule.name, 0) >= rule.max_in_flight:
+                return await _overloaded()(scope, receive, send)
+            retry_after = await self._check(rule, request)
+            if retry_after:
+                return await _too_many(retry_after)(scope, receive, send)
+
+        self.in_flight += 1
+        if rule:
+            self.rule_in_flight[rule.name] = self.rule_in_flight.get(rule.name, 0) + 1
+        try:
+            # Returns only once the last body chunk has been sent (or on error)
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight -= 1
+            if rule:
+                self.rule_in_flight[rule.name] -= 1
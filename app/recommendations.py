@@ -0,0 +1,220 @@
+import heapq
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, func, insert, or_, select, union, update
+from sqlalchemy.orm import Session
+
+from app.models.membership import Membership
+from app.models.post import Post
+from app.models.recommendation import Recommendation
+from app.models.user import User
+
+MAX_RECOMMENDATIONS = 50
+# An empty list is rebuilt on page view at most this often
+EMPTY_REFRESH_INTERVAL = timedelta(minutes=15)
+BATCH_SIZE = 2000
+
+GAME_WEIGHT = 3.0
+PLATFORM_WEIGHT = 1.0
+OPENNESS_WEIGHT = 0.5
+SOON_WEIGHT = 1.0
+UNSCHEDULED_SOON = 0.25
+
+
+@dataclass
+class Profile:
+    games: dict[str, float] = field(default_factory=dict)
+    platforms: dict[str, float] = field(default_factory=dict)
+    seen: set[int] = field(default_factory=set)
+
+    def __bool__(self) -> bool:
+        return bool(self.games or self.platforms)
+
+
+def _split_platforms(platform: str) -> list[str]:
+    return [p.strip() for p in platform.split(",") if p.strip()]
+
+
+def _normalize(counts: Counter) -> dict[str, float]:
+    total = sum(counts.values())
+    return {k: v / total for k, v in counts.items()} if total else {}
+
+
+def build_profiles(db: Session, user_ids) -> dict[int, Profile]:
+    user_ids = list(user_ids)
+    games: dict[int, Counter] = {uid: Counter() for uid in user_ids}
+    platforms: dict[int, Counter] = {uid: Counter() for uid in user_ids}
+    seen: dict[int, set[int]] = {uid: set() for uid in user_ids}
+    if not user_ids:
+        return {}
+
+    authored = select(Post.author_id, Post.id, Post.game, Post.platform).where(Post.author_id.in_(user_ids))
+    joined = (
+        select(Membership.user_id, Post.id, Post.game, Post.platform, Membership.status == "accepted")
+        .join(Post, Post.id == Membership.post_id)
+        .where(Membership.user_id.in_(user_ids))
+    )
+    for uid, post_id, game, platform in db.execute(authored):
+        games[uid][game] += 1
+        platforms[uid].update(_split_platforms(platform))
+        seen[uid].add(post_id)
+    # Only sessions the user actually played count as taste; pending and denied
+    # requests still mark the post as seen so it is not recommended back to them.
+    for uid, post_id, game, platform, accepted in db.execute(joined):
+        if accepted:
+            games[uid][game] += 1
+            platforms[uid].update(_split_platforms(platform))
+        seen[uid].add(post_id)
+
+    return {
+        uid: Profile(_normalize(games[uid]), _normalize(platforms[uid]), seen[uid])
+        for uid in user_ids
+    }
+
+
+def _candidates(now: datetime):
+    accepted = (
+        select(Membership.post_id, func.count().label("accepted"))
+        .where(Membership.status == "accepted")
+        .group_by(Membership.post_id)
+        .subquery()
+    )
+    return (
+        select(
+            Post.id,
+            Post.author_id,
+            Post.game,
+            Post.platform,
+            Post.max_players,
+            Post.scheduled_at,
+            func.coalesce(accepted.c.accepted, 0),
+        )
+        .outerjoin(accepted, accepted.c.post_id == Post.id)
+        .where(Post.archived_at.is_(None))
+        .where(or_(Post.scheduled_at.is_(None), Post.scheduled_at > now))
+    )
+
+
+def _as_utc(dt: datetime) -> datetime:
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+def refresh_due(built_at: datetime | None) -> bool:
+    return built_at is None or _as_utc(built_at) < datetime.now(timezone.utc) - EMPTY_REFRESH_INTERVAL
+
+
+def score_batch(profile: Profile, user_id: int, rows, now: datetime) -> list[tuple[float, int]]:
+    # Rows are plain column tuples from _candidates(); scoring a whole fetched
+    # partition at once keeps ORM object construction out of the hot loop.
+    games, platforms, seen = profile.games, profile.platforms, profile.seen
+    scored = []
+    for post_id, author_id, game, platform, max_players, scheduled_at, accepted in rows:
+        if author_id == user_id or post_id in seen:
+            continue
+        free = max_players - accepted - 1
+        if free <= 0:
+            continue
+        score = GAME_WEIGHT * games.get(game, 0.0)
+        score += PLATFORM_WEIGHT * sum(platforms.get(p, 0.0) for p in _split_platforms(platform))
+        if score <= 0:
+            continue
+        score += OPENNESS_WEIGHT * free / max_players
+        if scheduled_at is None:
+            score += SOON_WEIGHT * UNSCHEDULED_SOON
+        else:
+            hours = (_as_utc(scheduled_at) - now).total_seconds() / 3600
+            score += SOON_WEIGHT / (1 + max(hours, 0) / 24)
+        scored.append((score, post_id))
+    return scored
+
+
+def refresh_user(db: Session, user_id: int) -> int:
+    db.flush()
+    now = datetime.now(timezone.utc)
+    db.execute(delete(Recommendation).where(Recommendation.user_id == user_id))
+    db.execute(update(User).where(User.id == user_id).values(recommendations_at=now))
+    profile = build_profiles(db, [user_id])[user_id]
+    if not profile:
+        return 0
+
+    stmt = _candidates(now).where(
+        or_(
+            Post.game.in_(list(profile.games)),
+            *[Post.platform.contains(p) for p in profile.platforms],
+        )
+    )
+    top: list[tuple[float, int]] = []
+    result = db.execute(stmt.execution_options(yield_per=BATCH_SIZE))
+    for rows in result.partitions():
+        top = heapq.nlargest(MAX_RECOMMENDATIONS, top + score_batch(profile, user_id, rows, now))
+
+    if top:
+        db.execute(
+            insert(Recommendation),
+            [{"user_id": user_id, "post_id": post_id, "score": score, "computed_at": now} for score, post_id in top],
+        )
+    return len(top)
+
+
+def refresh_post(db: Session, post_id: int) -> int:
+    db.flush()
+    now = datetime.now(timezone.utc)
+    row = db.execute(_candidates(now).where(Post.id == post_id)).first()
+    if row is None:
+        db.execute(delete(Recommendation).where(Recommendation.post_id == post_id))
+        return 0
+
+    # Only users who already have this post listed or who have played this game
+    # are rescored; platform-only matches are picked up on their next full refresh.
+    history = union(
+        select(Post.author_id).where(Post.game == row.game),
+        select(Membership.user_id)
+        .join(Post, Post.id == Membership.post_id)
+        .where(Post.game == row.game, Membership.status == "accepted"),
+        select(Recommendation.user_id).where(Recommendation.post_id == post_id),
+    )
+    user_ids = [uid for (uid,) in db.execute(history)]
+    db.execute(delete(Recommendation).where(Recommendation.post_id == post_id))
+    if not user_ids:
+        return 0
+
+    profiles = build_profiles(db, user_ids)
+    values = []
+    for uid, profile in profiles.items():
+        for score, pid in score_batch(profile, uid, [row], now):
+            values.append({"user_id": uid, "post_id": pid, "score": score, "computed_at": now})
+    if not values:
+        return 0
+
+    db.execute(insert(Recommendation), values)
+    ranked = (
+        select(
+            Recommendation.id,
+            func.row_number()
+            .over(partition_by=Recommendation.user_id, order_by=Recommendation.score.desc())
+            .label("rank"),
+        )
+        .where(Recommendation.user_id.in_([v["user_id"] for v in values]))
+        .subquery()
+    )
+    db.execute(
+        delete(Recommendation).where(
+            Recommendation.id.in_(select(ranked.c.id).where(ranked.c.rank > MAX_RECOMMENDATIONS))
+        )
+    )
+    return len(values)
+
+
+if __name__ == "__main__":
+    from app.database import SessionLocal
+    from app.models.user import User
+
+    db = SessionLocal()
+    try:
+        for (uid,) in db.execute(select(User.id)).all():
+            refresh_user(db, uid)
+            db.commit()
+    finally:
+        db.close()
@@ -0,0 +1,35 @@
+import secrets
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Request, HTTPException
+from fastapi.responses import StreamingResponse
+
+from app.config import settings
+from app.export import FORMATS, TABLES, export_chunks, export_engine, high_watermark
+
+router = APIRouter(prefix="/admin")
+
+
+def _authorized(request: Request) -> bool:
+    header = request.headers.get("authorization", "")
+    scheme, _, token = header.partition(" ")
+    return scheme.lower() == "bearer" and secrets.compare_digest(token, settings.EXPORT_TOKEN)
+
+
+@router.get("/export/{table}")
+def export_table(request: Request, table: str, format: str = "ndjson", since: Optional[datetime] = None):
+    if not settings.EXPORT_TOKEN:
+        raise HTTPException(status_code=404)
+    if not _authorized(request):
+        raise HTTPException(status_code=401, headers={"WWW-Authenticate": "Bearer"})
+    if table not in TABLES or format not in FORMATS:
+        raise HTTPException(status_code=404)
+
+    # Pin the upper bound now so the next incremental run can start exactly here
+    with export_engine().connect() as conn:
+        until = high_watermark(conn, table, since)
+    headers = {"Content-Disposition": f'attachment; filename="{table}.{format}"'}
+    if until is not None:
+        headers["X-Export-Watermark"] = until.isoformat()
+    return StreamingResponse(export_chunks(table, format, since, until), media_type=FORMATS[format], headers=headers)
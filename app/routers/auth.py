@@ -5,17 +5,41 @@ from better_profanity import profanity
 from fastapi import APIRouter, Request, Form, Depends
 from fastapi.responses import RedirectResponse
 from fastapi.templating import Jinja2Templates
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from app.database import get_db
 from app.models.user import User
 from app.auth_utils import hash_password, verify_password
+from app.availability import taken
 from app.flash import flash
 
 router = APIRouter(prefix="/auth")
 templates = Jinja2Templates(directory="app/templates")
 
 
+USERNAME_TAKEN = "Username already taken."
+EMAIL_TAKEN = "Email already registered."
+
+
+def _username_error(db: Session, username: str) -> str | None:
+    if not re.fullmatch(r"[A-Za-z0-9_]+", username):
+        return "Username may only contain letters, numbers, and underscores."
+    if profanity.contains_profanity(username):
+        return "Username contains inappropriate language."
+    if taken.username_taken(db, username):
+        return USERNAME_TAKEN
+    return None
+
+
+def _email_error(db: Session, email: str) -> str | None:
+    if not re.fullmatch(r"[^@\s]+@[^@\s]+\.[^@\s]+", email):
+        return "Enter a valid email address."
+    if taken.email_taken(db, email):
+        return EMAIL_TAKEN
+    return None
+
+
 @router.get("/register")
 def register_form(request: Request):
     return templates.TemplateResponse("auth/register.html", {"request": request, "form": {}, "errors": {}})
@@ -32,17 +56,12 @@ def register(
     form = {"username": username, "email": email, "password": password}
     errors = {}
 
-    if not re.fullmatch(r"[A-Za-z0-9_]+", username):
-        errors["username"] = "Username may only contain letters, numbers, and underscores."
-    elif profanity.contains_profanity(username):
-        errors["username"] = "Username contains inappropriate language."
-    elif db.query(User).filter(User.username == username).first():
-        errors["username"] = "Username already taken."
-
-    if not re.fullmatch(r"[^@\s]+@[^@\s]+\.[^@\s]+", email):
-        errors["email"] = "Enter a valid email address."
-    elif db.query(User).filter(User.email == email).first():
-        errors["email"] = "Email already registered."
+    username_error = _username_error(db, username)
+    if username_error:
+        errors["username"] = username_error
+    email_error = _email_error(db, email)
+    if email_error:
+        errors["email"] = email_error
 
     if not (8 <= len(password) <= 24):
         errors["password"] = "Password must be 8–24 characters."
@@ -59,14 +78,37 @@ def register(
         return templates.TemplateResponse("auth/register.html", {"request": request, "form": form, "errors": errors})
     user = User(username=username, email=email, password_hash=hash_password(password))
     db.add(user)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        # Lost a race with a concurrent registration; the constraint decides
+        db.rollback()
+        # Hits are re-checked against the database, so recording both is safe
+        taken.add(username, email)
+        if db.query(User.id).filter(User.username == username).first():
+            errors["username"] = USERNAME_TAKEN
+        else:
+            errors["email"] = EMAIL_TAKEN
+        return templates.TemplateResponse("auth/register.html", {"request": request, "form": form, "errors": errors})
     db.refresh(user)
+    taken.add(user.username, user.email)
     request.session["user_id"] = user.id
     request.session["username"] = user.username
     flash(request, f"Welcome, {user.username}!", "success")
     return RedirectResponse(url="/posts", status_code=303)
 
 
+# Usernames only: emails are private, and checking them here would allow
+# enumeration far faster than the register endpoint's limit allows.
+@router.get("/availability")
+def availability(username: str | None = None, db: Session = Depends(get_db)):
+    result = {}
+    if username is not None:
+        error = _username_error(db, username)
+        result["username"] = {"available": error is None, "error": error}
+    return result
+
+
 @router.get("/login")
 def login_form(request: Request):
     return templates.TemplateResponse("auth/login.html", {"request": request, "form": {}})
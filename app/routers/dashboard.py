@@ -18,18 +18,27 @@ def dashboard(request: Request, db: Session = Depends(get_db)):
     if not current_user:
         return RedirectResponse(url="/auth/login", status_code=303)
 
-    my_posts = db.query(Post).filter(Post.author_id == current_user.id).order_by(Post.created_at.desc()).all()
+    my_posts = (
+        db.query(Post)
+        .filter(Post.author_id == current_user.id, Post.archived_at.is_(None))
+        .order_by(Post.created_at.desc())
+        .all()
+    )
     for post in my_posts:
         post.accepted_count = db.query(Membership).filter_by(post_id=post.id, status="accepted").count()
 
     joined_groups = (
         db.query(Membership)
-        .filter_by(user_id=current_user.id, status="accepted")
+        .join(Post, Post.id == Membership.post_id)
+        .filter(Post.archived_at.is_(None))
+        .filter(Membership.user_id == current_user.id, Membership.status == "accepted")
         .all()
     )
     pending_requests = (
         db.query(Membership)
-        .filter_by(user_id=current_user.id, status="pending")
+        .join(Post, Post.id == Membership.post_id)
+        .filter(Post.archived_at.is_(None))
+        .filter(Membership.user_id == current_user.id, Membership.status == "pending")
         .all()
     )
 
@@ -1,22 +1,30 @@
 from datetime import datetime, timezone
 
-from fastapi import APIRouter, Request, Depends
+from fastapi import APIRouter, Request, Form, Depends
 from fastapi.responses import RedirectResponse
 from fastapi.templating import Jinja2Templates
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 
 from app.database import get_db
 from app.dependencies import get_current_user
 from app.models.post import Post
 from app.models.membership import Membership
-from app.models.notification import Notification
 from app.flash import flash
+from app.outbox import enqueue, enqueue_many
 
 router = APIRouter(prefix="/posts")
 
 
 def _notify(db, user_id: int, message: str, link: str = None):
-    db.add(Notification(user_id=user_id, message=message, link=link))
+    enqueue(db, "notification", {"user_id": user_id, "message": message, "link": link})
+
+
+def _notify_many(db, notifications: list[dict]):
+    enqueue_many(db, "notification", notifications)
+
+
+def _membership_changed(db, user_id: int, post_id: int):
+    enqueue(db, "recommendations", {"user_id": user_id, "post_id": post_id})
 
 
 templates = Jinja2Templates(directory="app/templates")
@@ -32,6 +40,10 @@ def request_join(request: Request, post_id: int, db: Session = Depends(get_db)):
     if not post:
         return RedirectResponse(url="/posts", status_code=303)
 
+    if post.archived_at:
+        flash(request, "This session has ended.", "warning")
+        return RedirectResponse(url=f"/posts/{post_id}", status_code=303)
+
     if post.author_id == current_user.id:
         flash(request, "You cannot request to join your own post.", "warning")
         return RedirectResponse(url=f"/posts/{post_id}", status_code=303)
@@ -45,6 +57,7 @@ def request_join(request: Request, post_id: int, db: Session = Depends(get_db)):
         existing.requested_at = datetime.now(timezone.utc)
         existing.responded_at = None
         _notify(db, post.author_id, f"{current_user.username} requested to join your {post.game} group", f"/posts/{post_id}/requests")
+        _membership_changed(db, current_user.id, post_id)
         db.commit()
         flash(request, "Re-request sent!", "success")
         return RedirectResponse(url=f"/posts/{post_id}", status_code=303)
@@ -57,6 +70,7 @@ def request_join(request: Request, post_id: int, db: Session = Depends(get_db)):
     m = Membership(user_id=current_user.id, post_id=post_id, status="pending")
     db.add(m)
     _notify(db, post.author_id, f"{current_user.username} requested to join your {post.game} group", f"/posts/{post_id}/requests")
+    _membership_changed(db, current_user.id, post_id)
     db.commit()
     flash(request, "Join request sent!", "success")
     return RedirectResponse(url=f"/posts/{post_id}", status_code=303)
@@ -71,6 +85,7 @@ def withdraw_request(request: Request, post_id: int, db: Session = Depends(get_d
     m = db.query(Membership).filter_by(user_id=current_user.id, post_id=post_id, status="pending").first()
     if m:
         db.delete(m)
+        _membership_changed(db, current_user.id, post_id)
         db.commit()
         flash(request, "Request withdrawn.", "info")
     return RedirectResponse(url=f"/posts/{post_id}", status_code=303)
@@ -85,6 +100,7 @@ def leave_group(request: Request, post_id: int, db: Session = Depends(get_db)):
     m = db.query(Membership).filter_by(user_id=current_user.id, post_id=post_id, status="accepted").first()
     if m:
         db.delete(m)
+        _membership_changed(db, current_user.id, post_id)
         db.commit()
         flash(request, "You have left the group.", "info")
     return RedirectResponse(url=f"/posts/{post_id}", status_code=303)
@@ -101,20 +117,84 @@ def list_requests(request: Request, post_id: int, db: Session = Depends(get_db))
         flash(request, "Not found or not authorized.", "danger")
         return RedirectResponse(url="/posts", status_code=303)
 
-    pending = db.query(Membership).filter_by(post_id=post_id, status="pending").all()
+    pending = (
+        db.query(Membership)
+        .options(joinedload(Membership.user))
+        .filter_by(post_id=post_id, status="pending")
+        .all()
+    )
     return templates.TemplateResponse(
         "posts/requests.html",
         {"request": request, "post": post, "requests": pending, "current_user": current_user},
     )
 
 
+@router.post("/{post_id}/requests/bulk")
+def bulk_respond(
+    request: Request,
+    post_id: int,
+    action: str = Form(...),
+    membership_ids: list[int] = Form([]),
+    db: Session = Depends(get_db),
+):
+    current_user = get_current_user(request, db)
+    if not current_user:
+        return RedirectResponse(url="/auth/login", status_code=303)
+
+    # Lock the post row so concurrent accepts cannot overfill the group
+    post = db.query(Post).filter(Post.id == post_id).with_for_update().first()
+    if not post or post.author_id != current_user.id:
+        flash(request, "Not authorized.", "danger")
+        return RedirectResponse(url="/posts", status_code=303)
+
+    if action not in ("accept", "deny") or not membership_ids:
+        flash(request, "Select at least one request.", "warning")
+        return RedirectResponse(url=f"/posts/{post_id}/requests", status_code=303)
+
+    selected = (
+        db.query(Membership)
+        .options(joinedload(Membership.user))
+        .filter(Membership.id.in_(membership_ids))
+        .filter_by(post_id=post_id, status="pending")
+        .order_by(Membership.requested_at)
+        .all()
+    )
+
+    skipped = []
+    if action == "accept":
+        accepted = db.query(Membership).filter_by(post_id=post_id, status="accepted").count()
+        open_slots = max(post.max_players - accepted - 1, 0)
+        selected, skipped = selected[:open_slots], selected[open_slots:]
+
+    now = datetime.now(timezone.utc)
+    status = "accepted" if action == "accept" else "denied"
+    message = f"Your request to join {post.game} was accepted!" if action == "accept" else f"Your request to join {post.game} was denied."
+    for m in selected:
+        m.status = status
+        m.responded_at = now
+    _notify_many(db, [{"user_id": m.user_id, "message": message, "link": f"/posts/{post_id}"} for m in selected])
+    if action == "accept":
+        enqueue_many(db, "recommendations", [{"user_id": m.user_id, "post_id": post_id} for m in selected])
+        enqueue_many(db, "trending", [{"game": post.game, "kind": "join", "at": now.isoformat()} for m in selected])
+    # Read the eager-loaded names before commit expires them
+    names = ", ".join(m.user.username for m in selected)
+    db.commit()
+
+    if selected:
+        flash(request, f"{names} {status}.", "success" if action == "accept" else "info")
+    if skipped:
+        flash(request, f"Group is full — {len(skipped)} request(s) left pending.", "warning")
+    return RedirectResponse(url=f"/posts/{post_id}/requests", status_code=303)
+
+
 @router.post("/{post_id}/requests/{membership_id}/accept")
 def accept_request(request: Request, post_id: int, membership_id: int, db: Session = Depends(get_db)):
     current_user = get_current_user(request, db)
     if not current_user:
         return RedirectResponse(url="/auth/login", status_code=303)
 
-    post = db.query(Post).filter(Post.id == post_id).first()
+    # Same lock as bulk_respond, so single and bulk accepts can't overfill the group together
+    post = db.query(Post).filter(Post.id == post_id).with_for_update().first()
     if not post or post.author_id != current_user.id:
         flash(request, "Not authorized.", "danger")
         return RedirectResponse(url="/posts", status_code=303)
@@ -124,13 +204,16 @@ def accept_request(request: Request, post_id: int, membership_id: int, db: Sessi
         flash(request, "Group is already full.", "warning")
         return RedirectResponse(url=f"/posts/{post_id}/requests", status_code=303)
 
-    m = db.query(Membership).filter_by(id=membership_id, post_id=post_id).first()
+    m = db.query(Membership).filter_by(id=membership_id, post_id=post_id, status="pending").first()
     if m:
         m.status = "accepted"
         m.responded_at = datetime.now(timezone.utc)
         _notify(db, m.user_id, f"Your request to join {post.game} was accepted!", f"/posts/{post_id}")
+        _membership_changed(db, m.user_id, post_id)
+        enqueue(db, "trending", {"game": post.game, "kind": "join", "at": m.responded_at.isoformat()})
+        username = m.user.username
         db.commit()
-        flash(request, f"{m.user.username} accepted!", "success")
+        flash(request, f"{username} accepted!", "success")
     return RedirectResponse(url=f"/posts/{post_id}/requests", status_code=303)
 
 
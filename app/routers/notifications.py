@@ -6,6 +6,7 @@ from sqlalchemy.orm import Session
 from app.database import get_db, SessionLocal
 from app.dependencies import get_current_user
 from app.models.notification import Notification
+from app.streaming import stream_template
 
 router = APIRouter(prefix="/notifications")
 templates = Jinja2Templates(directory="app/templates")
@@ -28,6 +29,12 @@ def list_notifications(request: Request, db: Session = Depends(get_db)):
     if not current_user:
         return RedirectResponse(url="/auth/login", status_code=303)
 
+    # Mark read up front so the rows loaded below stay populated after commit
+    db.query(Notification).filter_by(user_id=current_user.id, is_read=False).update(
+        {"is_read": True}, synchronize_session=False
+    )
+    db.commit()
+
     notifications = (
         db.query(Notification)
         .filter_by(user_id=current_user.id)
@@ -35,11 +42,8 @@ def list_notifications(request: Request, db: Session = Depends(get_db)):
         .all()
     )
 
-    for n in notifications:
-        n.is_read = True
-    db.commit()
-
-    return templates.TemplateResponse(
+    return stream_template(
+        templates,
         "notifications/index.html",
         {"request": request, "notifications": notifications, "current_user": current_user},
     )
@@ -1,7 +1,8 @@
 from fastapi import APIRouter, Request, Form, Depends
 from fastapi.responses import RedirectResponse
 from fastapi.templating import Jinja2Templates
-from sqlalchemy.orm import Session
+from sqlalchemy import func
+from sqlalchemy.orm import Session, joinedload
 from typing import Optional
 
 from app.database import get_db
@@ -10,6 +11,9 @@ from app.models.post import Post
 from app.models.membership import Membership
 from app.schemas.post import VALID_PLATFORMS
 from app.flash import flash
+from app.outbox import enqueue
+from app.archive import SCHEDULED_GRACE
+from app.streaming import stream_template
 from better_profanity import profanity
 
 router = APIRouter(prefix="/posts")
@@ -28,17 +32,25 @@ def list_posts(
     db: Session = Depends(get_db),
 ):
     current_user = get_current_user(request, db)
-    query = db.query(Post)
+    query = db.query(Post).options(joinedload(Post.author)).filter(Post.archived_at.is_(None))
     if game:
         query = query.filter(Post.game.ilike(f"%{game}%"))
     if platform:
         query = query.filter(Post.platform.contains(platform))
     posts = query.order_by(Post.created_at.desc()).all()
 
+    counts = dict(
+        db.query(Membership.post_id, func.count())
+        .join(Post, Post.id == Membership.post_id)
+        .filter(Post.archived_at.is_(None), Membership.status == "accepted")
+        .group_by(Membership.post_id)
+        .all()
+    )
     for post in posts:
-        post.accepted_count = _accepted_count(db, post.id)
+        post.accepted_count = counts.get(post.id, 0)
 
-    return templates.TemplateResponse(
+    return stream_template(
+        templates,
         "posts/index.html",
         {
             "request": request,
@@ -109,6 +121,9 @@ def create_post(
         scheduled_at=sched,
     )
     db.add(post)
+    db.flush()
+    enqueue(db, "recommendations", {"user_id": current_user.id, "post_id": post.id})
+    enqueue(db, "trending", {"game": post.game, "kind": "post", "at": post.created_at.isoformat()})
     db.commit()
     db.refresh(post)
     flash(request, "LFG post created!", "success")
@@ -193,7 +208,7 @@ def edit_post(
         flash(request, "Description contains inappropriate language.", "danger")
         return RedirectResponse(url=f"/posts/{post_id}/edit", status_code=303)
 
-    from datetime import datetime
+    from datetime import datetime, timezone
     sched = None
     if scheduled_at:
         try:
@@ -207,6 +222,12 @@ def edit_post(
     post.description = description
     post.max_players = max_players
     post.scheduled_at = sched
+    if post.archived_at and sched:
+        # Rescheduling an ended session brings it back instead of leaving it archived
+        starts = sched if sched.tzinfo else sched.replace(tzinfo=timezone.utc)
+        if starts > datetime.now(timezone.utc) - SCHEDULED_GRACE:
+            post.archived_at = None
+    enqueue(db, "recommendations", {"user_id": current_user.id, "post_id": post_id})
     db.commit()
     flash(request, "Post updated.", "success")
     return RedirectResponse(url=f"/posts/{post_id}", status_code=303)
@@ -0,0 +1,63 @@
+from fastapi import APIRouter, Request, Depends
+from fastapi.responses import RedirectResponse
+from fastapi.templating import Jinja2Templates
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session, joinedload
+from datetime import datetime, timezone
+
+from app.database import get_db
+from app.dependencies import get_current_user
+from app.models.post import Post
+from app.models.membership import Membership
+from app.models.recommendation import Recommendation
+from app.recommendations import MAX_RECOMMENDATIONS, refresh_due, refresh_user
+
+router = APIRouter(prefix="/recommendations")
+templates = Jinja2Templates(directory="app/templates")
+
+
+def _load(db: Session, user_id: int) -> list[Recommendation]:
+    return (
+        db.query(Recommendation)
+        .join(Recommendation.post)
+        .options(joinedload(Recommendation.post).joinedload(Post.author))
+        .filter(Recommendation.user_id == user_id, Post.archived_at.is_(None))
+        .filter(or_(Post.scheduled_at.is_(None), Post.scheduled_at > datetime.now(timezone.utc)))
+        .order_by(Recommendation.score.desc())
+        .limit(MAX_RECOMMENDATIONS)
+        .all()
+    )
+
+
+@router.get("")
+def list_recommendations(request: Request, db: Session = Depends(get_db)):
+    current_user = get_current_user(request, db)
+    if not current_user:
+        return RedirectResponse(url="/auth/login", status_code=303)
+
+    recs = _load(db, current_user.id)
+    if not recs and refresh_due(current_user.recommendations_at):
+        # Cold start for users whose list was never built; afterwards the list
+        # is kept up to date by the post and membership hooks. The timestamp
+        # keeps users with nothing to recommend from rescanning on every visit.
+        found = refresh_user(db, current_user.id)
+        db.commit()
+        if found:
+            recs = _load(db, current_user.id)
+
+    posts = [r.post for r in recs]
+    counts = dict(
+        db.query(Membership.post_id, func.count())
+        .filter(Membership.post_id.in_([p.id for p in posts]), Membership.status == "accepted")
+        .group_by(Membership.post_id)
+        .all()
+    ) if posts else {}
+    for post in posts:
+        post.accepted_count = counts.get(post.id, 0)
+    # Stored scores lag behind joins; hide sessions that have filled up since
+    posts = [p for p in posts if p.accepted_count + 1 < p.max_players]
+
+    return templates.TemplateResponse(
+        "recommendations/index.html",
+        {"request": request, "posts": posts, "current_user": current_user},
+    )
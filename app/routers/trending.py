@@ -0,0 +1,20 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.trending import WINDOWS, top
+
+router = APIRouter(prefix="/trending")
+
+
+@router.get("")
+def trending(window: int = Query(WINDOWS[0]), limit: int = Query(10, ge=1, le=50), db: Session = Depends(get_db)):
+    if window not in WINDOWS:
+        window = WINDOWS[0]
+    return {
+        "window_hours": window,
+        "games": [
+            {"game": t.game, "posts": t.posts, "joins": t.joins, "score": t.score}
+            for t in top(db, window, limit)
+        ],
+    }
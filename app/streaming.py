@@ -0,0 +1,47 @@
+from fastapi.responses import StreamingResponse
+from fastapi.templating import Jinja2Templates
+
+from app.csrf import get_csrf_token
+from app.flash import get_flashed_messages
+
+# The first chunk is kept small so the page head reaches the browser right
+# away; after that larger chunks keep per-send overhead down.
+FIRST_CHUNK_SIZE = 4096
+CHUNK_SIZE = 32768
+
+
+def _chunks(parts, chunk_size: int):
+    buf, size, limit = [], 0, FIRST_CHUNK_SIZE
+    for part in parts:
+        buf.append(part)
+        size += len(part)
+        if size >= limit:
+            yield "".join(buf)
+            buf, size, limit = [], 0, chunk_size
+    if buf:
+        yield "".join(buf)
+
+
+def stream_template(
+    templates: Jinja2Templates,
+    name: str,
+    context: dict,
+    status_code: int = 200,
+    chunk_size: int = CHUNK_SIZE,
+) -> StreamingResponse:
+    # Headers (and with them the session cookie) go out before the template
+    # runs, so anything that mutates the session has to happen up front.
+    # Route handlers must also eager-load whatever the template touches: the
+    # DB session is closed by the time the body is rendered.
+    request = context["request"]
+    flashes = get_flashed_messages(request)
+    if request.session.get("user_id"):
+        get_csrf_token(request)
+
+    template = templates.get_template(name)
+    context = {**context, "get_flashed_messages": lambda _request: flashes}
+    return StreamingResponse(
+        _chunks(template.generate(context), chunk_size),
+        status_code=status_code,
+        media_type="text/html",
+    )
@@ -0,0 +1,229 @@
+import asyncio
+import logging
+import sys
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.membership import Membership
+from app.models.outbox import OutboxEvent
+from app.models.post import Post
+from app.models.trending import GameActivity, GameTrend, TrendWatermark
+
+logger = logging.getLogger(__name__)
+
+WINDOWS = (24, 168)  # hours
+POST_WEIGHT = 1
+JOIN_WEIGHT = 2
+ROLLER_LOCK_ID = 0x7472656E64  # advisory lock key, "trend"
+
+
+def bucket_of(at: datetime) -> datetime:
+    if at.tzinfo is None:
+        at = at.replace(tzinfo=timezone.utc)
+    return at.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+def _insert(db: Session):
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"trending counters need upsert support, not available for {dialect}")
+    return insert
+
+
+def _watermarks(db: Session) -> dict[int, datetime]:
+    # Rows are locked until commit: record() and roll() must agree on where each
+    # window starts, or a bucket can be added after it was already expired.
+    stmt = select(TrendWatermark.window_hours, TrendWatermark.expired_before).with_for_update()
+    marks = {w: bucket_of(m) for w, m in db.execute(stmt)}
+    missing = [w for w in WINDOWS if w not in marks]
+    if missing:
+        now = bucket_of(datetime.now(timezone.utc))
+        rows = [{"window_hours": w, "expired_before": now - timedelta(hours=w)} for w in missing]
+        db.execute(_insert(db)(TrendWatermark).values(rows).on_conflict_do_nothing())
+        marks = {w: bucket_of(m) for w, m in db.execute(stmt)}
+    return marks
+
+
+def _claim_roller(db: Session) -> bool:
+    # Every web process runs the roller loop; only one of them rolls at a time
+    if db.get_bind().dialect.name != "postgresql":
+        return True
+    return db.execute(select(func.pg_try_advisory_xact_lock(ROLLER_LOCK_ID))).scalar()
+
+
+def _add_trends(db: Session, window: int, totals: dict[str, list[int]]) -> None:
+    if not totals:
+        return
+    insert = _insert(db)
+    stmt = insert(GameTrend).values([
+        {"window_hours": window, "game": game, "posts": p, "joins": j, "score": p * POST_WEIGHT + j * JOIN_WEIGHT}
+        for game, (p, j) in totals.items()
+    ])
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=["window_hours", "game"],
+        set_={
+            "posts": GameTrend.posts + stmt.excluded.posts,
+            "joins": GameTrend.joins + stmt.excluded.joins,
+            "score": GameTrend.score + stmt.excluded.score,
+        },
+    ))
+
+
+def record(db: Session, counts: dict[tuple[str, datetime], list[int]]) -> None:
+    # counts maps (game, bucket_start) to [posts, joins]
+    if not counts:
+        return
+    # Take the watermark locks before touching any activity rows, in the same
+    # order as roll(), so the two can't deadlock.
+    marks = _watermarks(db)
+    insert = _insert(db)
+    stmt = insert(GameActivity).values([
+        {"game": game, "bucket_start": bucket, "posts": p, "joins": j}
+        for (game, bucket), (p, j) in counts.items()
+    ])
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=["game", "bucket_start"],
+        set_={"posts": GameActivity.posts + stmt.excluded.posts, "joins": GameActivity.joins + stmt.excluded.joins},
+    ))
+
+    for window, mark in marks.items():
+        totals: dict[str, list[int]] = defaultdict(lambda: [0, 0])
+        for (game, bucket), (p, j) in counts.items():
+            # Buckets behind the watermark were already expired from this window
+            if bucket >= mark:
+                totals[game][0] += p
+                totals[game][1] += j
+        _add_trends(db, window, totals)
+
+
+def roll(db: Session) -> None:
+    if not _claim_roller(db):
+        db.rollback()
+        return
+    now = bucket_of(datetime.now(timezone.utc))
+    for window, mark in _watermarks(db).items():
+        cutoff = now - timedelta(hours=window)
+        if cutoff <= mark:
+            continue
+        # Conditional advance as a second guard: if the mark moved under us,
+        # the buckets were already subtracted by whoever moved it.
+        advanced = db.execute(
+            update(TrendWatermark)
+            .where(TrendWatermark.window_hours == window, TrendWatermark.expired_before == mark)
+            .values(expired_before=cutoff)
+        ).rowcount
+        if not advanced:
+            continue
+        expired = db.execute(
+            select(GameActivity.game, func.sum(GameActivity.posts), func.sum(GameActivity.joins))
+            .where(GameActivity.bucket_start >= mark, GameActivity.bucket_start < cutoff)
+            .group_by(GameActivity.game)
+        ).all()
+        for game, p, j in expired:
+            db.execute(
+                update(GameTrend)
+                .where(GameTrend.window_hours == window, GameTrend.game == game)
+                .values(
+                    posts=GameTrend.posts - p,
+                    joins=GameTrend.joins - j,
+                    score=GameTrend.score - (p * POST_WEIGHT + j * JOIN_WEIGHT),
+                )
+            )
+
+    db.execute(delete(GameTrend).where(GameTrend.score <= 0))
+    db.execute(delete(GameActivity).where(GameActivity.bucket_start < now - timedelta(hours=max(WINDOWS))))
+    db.commit()
+
+
+def top(db: Session, window: int = WINDOWS[0], limit: int = 10) -> list[GameTrend]:
+    return (
+        db.query(GameTrend)
+        .filter(GameTrend.window_hours == window, GameTrend.score > 0)
+        .order_by(GameTrend.score.desc())
+        .limit(limit)
+        .all()
+    )
+
+
+def rebuild(db: Session) -> None:
+    # Events still queued describe rows the recount below already includes;
+    # claim them in this transaction so the worker doesn't count them again.
+    # The UPDATE row-locks them, waiting for any drain already holding some.
+    db.execute(
+        update(OutboxEvent)
+        .where(OutboxEvent.event_type == "trending", OutboxEvent.status == "pending")
+        .values(status="done", processed_at=datetime.now(timezone.utc))
+    )
+    now = bucket_of(datetime.now(timezone.utc))
+    since = now - timedelta(hours=max(WINDOWS))
+    counts: dict[tuple[str, datetime], list[int]] = defaultdict(lambda: [0, 0])
+
+    posts = select(Post.game, Post.created_at).where(Post.created_at >= since)
+    for game, created_at in db.execute(posts.execution_options(yield_per=5000)):
+        counts[(game, bucket_of(created_at))][0] += 1
+    joins = (
+        select(Post.game, Membership.responded_at)
+        .join(Post, Post.id == Membership.post_id)
+        .where(Membership.status == "accepted", Membership.responded_at >= since)
+    )
+    for game, responded_at in db.execute(joins.execution_options(yield_per=5000)):
+        counts[(game, bucket_of(responded_at))][1] += 1
+
+    db.execute(delete(GameActivity))
+    db.execute(delete(GameTrend))
+    db.execute(delete(TrendWatermark))
+    db.add_all(TrendWatermark(window_hours=w, expired_before=now - timedelta(hours=w)) for w in WINDOWS)
+    db.flush()
+    record(db, counts)
+    db.commit()
+
+
+def trending_games(window: int = WINDOWS[0], limit: int = 5) -> list[GameTrend]:
+    db = SessionLocal()
+    try:
+        return top(db, window, limit)
+    finally:
+        db.close()
+
+
+def roll_once() -> None:
+    db = SessionLocal()
+    try:
+        roll(db)
+    finally:
+        db.close()
+
+
+async def run_roller() -> None:
+    while True:
+        try:
+            await asyncio.to_thread(roll_once)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("trending roll failed")
+        await asyncio.sleep(settings.TRENDING_ROLL_SECONDS)
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "rebuild"
+    db = SessionLocal()
+    try:
+        if command == "rebuild":
+            rebuild(db)
+            print("Trending counters rebuilt.")
+        elif command == "roll":
+            roll(db)
+        else:
+            sys.exit("usage: python -m app.trending [rebuild|roll]")
+    finally:
+        db.close()